@@ -112,6 +112,11 @@ On data structures and comparisons based on a set of fundamental algorithms
         Sequential search in python is implemented with the if ... in L. As such
         a binary search would be much more efficient.
 
+        For a single lookup on a sorted list, use bisect.bisect_left. When
+        there are many lookups to do, pass them all at once to np.searchsorted
+        (see search() in arrays.py), which runs every binary search in C and
+        so only pays the cost of calling into NumPy once.
+
     1.1.3 Sorting Algorithms
 
         Sorting algorithms share the goal of outputting a sorted list, but the
@@ -144,7 +149,13 @@ On data structures and comparisons based on a set of fundamental algorithms
         some stable implementations.
 
         Note that while heapsort applies for arrays, it will be discussed in
-        the separate data structure instead. 
+        the separate data structure instead.
+
+        In practice, none of the above should be hand-written in python. The
+        canonical recommendation is np.sort (see sort() in arrays.py), which
+        runs entirely in C and beats every python implementation by orders of
+        magnitude. Do not wrap it in numba either, as numba's own np.sort is
+        2-5 times slower than NumPy's.
 
 
 1.2 Heaps
@@ -251,7 +262,12 @@ On data structures and comparisons based on a set of fundamental algorithms
             max_heapify() and thus use it repeatedly.
 
             Complexity: O(n) upon careful analysis
-            
+
+        Code: heap_numba.py holds max_heapify() and build_maxheap() compiled
+        with numba on an int64 np.ndarray (0-indexed). Both are plain loops of
+        index arithmetic and compare/swap, which is exactly where the CPython
+        interpreter overhead dominates the actual work.
+
         1.2.2.3 Min-heap variations
 
             This variation has an identical algorithm to max-heaps.
@@ -274,6 +290,12 @@ On data structures and comparisons based on a set of fundamental algorithms
        written iteratively, the latter is always preferred in terms of space
        efficiency***
 
+       max_heapify is tail recursive, so it can be written as a while loop that
+       moves i down to the largest child each pass. Heap sort then only needs
+       O(1) extra space, and in python every level also saves the creation of
+       a frame object, which costs more than the compare and swap itself. See
+       heaps.py for the iterative max_heapify, build_maxheap and heapsort.
+
         Algorithm Process:
             1) Build a max-heap - O(n)
             2) Swap Arr[i] containing max key with Arr[N] - O(1)
@@ -282,6 +304,13 @@ On data structures and comparisons based on a set of fundamental algorithms
 
         Complexity: O(nlog(n))
 
+        When only the k largest keys are wanted, stopping heap sort after k
+        extractions already brings this down to O(n + klog(n)). Better still
+        is a selection algorithm: np.partition (see top_k() in arrays.py) runs
+        quickselect in C in O(n). When k/n is smaller than about 1/log(n),
+        partition is the way to go. When most of the array is needed in
+        order anyway, just use np.sort.
+
 
 1.3 Binary Search Trees (BST)
 
@@ -325,6 +354,11 @@ On data structures and comparisons based on a set of fundamental algorithms
         While it seems similar to a heap, unfortunately there is no detailed
         analysis on a lower bound. This, however, can be implemented using a
         self-balancing BST.
+
+        Thirdly, create() need not be O(nlog(n)) if the data is already sorted
+        (e.g. after np.sort). Taking the median as the root and building each
+        half the same way gives a perfectly balanced tree in O(n), with no
+        rotations at all. See AVLArena.from_sorted() in avl.py.
     
     1.3.3 Traversals
 
@@ -334,6 +368,13 @@ On data structures and comparisons based on a set of fundamental algorithms
         Traversals are usually recursive and naturally have a space complexity
         of O(log(n)) or O(depth).
 
+        This can be brought down to O(1) with Morris traversal. Before going
+        down into the left subtree of a node, the empty right link of its
+        in-order predecessor is pointed back at the node, which is how the
+        walk returns up without a stack. The link is removed again on the way
+        back, so the tree is left unchanged. See inorder_morris() and
+        preorder_morris() in avl.py.
+
         A template for traversal algorithms is as such:
             Algo x(tree)
                 1. x(left_sub_tree)
@@ -463,6 +504,22 @@ On data structures and comparisons based on a set of fundamental algorithms
 
             Key algorithms are the 'insert', 'delete' and 'rebalance' algos.
 
+            avl.py implements the same algorithms, but as noted in 1.3.1 a
+            python object per node wastes most of its bytes on pointers and
+            bookkeeping. There, the nodes are instead laid out as a struct of
+            arrays (keys[], left[], right[], parent[], meta[]) and a child
+            "pointer" is an int32 index into them. This is roughly 12 times
+            smaller per node and keeps a descent on contiguous memory.
+
+            As the balance factor only ever needs the values {-1,0,+1}, i.e.
+            two bits, it shares a single byte (meta[]) with the height.
+
+            The plain object version still has its place: avl_pypy.py holds
+            it with __slots__ nodes, which is the faster of the two on PyPy.
+            avl_tree.py picks one of them according to the interpreter, and
+            also falls back to avl_pypy.py on CPython when neither numba nor a
+            built avl_c is available.
+
         1.3.6.4 Self-balancing algorithm
 
             The process of rotation as mentioned earlier will inevitably modify
@@ -498,6 +555,12 @@ On data structures and comparisons based on a set of fundamental algorithms
 
             Pseudocode 1. 4 different cases for balancing BSTs.
 
+            Since balance factors only take the values {-2,...,+2} at the node
+            and {-1,0,+1} at its heavier child, the nested IFs above can be
+            replaced by a table of 5x4 entries indexed by both, as done in
+            avl.py. On random inserts the inner IF is close to a coin flip, so
+            a table load avoids a good number of branch mispredictions.
+
 
         1.3.6.5 Complexity and Efficiency
 
@@ -0,0 +1,161 @@
+"""
+Array operations (see 1.1 of On Data Structures.py)
+
+None of the sorts in Table 4 are implemented in python here on purpose. A
+python level sort pays roughly a microsecond of interpreter overhead per
+comparison, whereas np.sort runs the whole sort in C (with SIMD sorting
+kernels since NumPy 2.0) and is limited by memory bandwidth instead.
+
+sort() is also deliberately not wrapped in numba's @njit. numba re-implements
+np.sort itself and the result is several times slower than NumPy's own.
+
+The exception is small inputs. Each call into NumPy costs around a
+microsecond before any work is done (converting a list, allocating the
+result, ...), which for a handful of elements is more than the python
+version takes in total. Below a per-function threshold, measured as the
+break-even point against the python version, the functions here therefore
+stay in python.
+"""
+
+import bisect
+import heapq
+import operator
+
+import numpy as np
+
+# Break-even input sizes, below which the python versions are faster
+_SORT_SMALL = 16            # for lists; np.sort of an ndarray always wins
+_SEARCH_SMALL = 32          # number of queries, for lists
+_COUNTING_SORT_SMALL = 16
+_TOP_K_SMALL = 16           # for lists
+
+
+def sort(arr, kind='quicksort'):
+    # kind='stable' gives a stable sort (merge/radix sort in NumPy)
+    if not isinstance(arr, np.ndarray) and len(arr) < _SORT_SMALL:
+        return np.array(sorted(arr))    # timsort, which is stable too
+    return np.sort(np.ascontiguousarray(arr), kind=kind)
+
+
+def search(sorted_arr, queries):
+    # Binary search for a batch of queries at once. Returns the index of each
+    # query in sorted_arr, or -1 where it is absent.
+    #
+    # np.searchsorted does the whole batch in C, so the cost of calling into
+    # NumPy is paid once rather than per query. For a single query that
+    # overhead is not worth it and bisect.bisect_left is the faster choice,
+    # which is what is used for a few queries on a list.
+    q = np.atleast_1d(queries)
+    if not isinstance(sorted_arr, np.ndarray) and q.size < _SEARCH_SMALL:
+        return np.array([_bisect_search(sorted_arr, x)
+                         for x in q.ravel().tolist()],
+                        dtype=np.intp).reshape(q.shape)
+    a = np.asarray(sorted_arr)
+    if a.size == 0:
+        return np.full(q.shape, -1, dtype=np.intp)
+    idx = np.searchsorted(a, q)
+    hit = (idx < a.size) & (a[np.minimum(idx, a.size - 1)] == q)
+    return np.where(hit, idx, -1)
+
+
+def _bisect_search(a, x):
+    i = bisect.bisect_left(a, x)
+    return i if i < len(a) and a[i] == x else -1
+
+
+def counting_sort(arr, k=None):
+    # Counting sort of non-negative ints smaller than k (see Table 4).
+    # np.bincount does the counting in C and np.repeat writes the output
+    # back out, so nothing is done per element in the interpreter.
+    # Raises ValueError for anything outside [0, k).
+    if len(arr) < _COUNTING_SORT_SMALL:
+        return _counting_sort_small(arr, k)
+    a = np.asarray(arr)
+    if a.dtype.kind not in 'biu':
+        raise ValueError('counting_sort() needs ints in [0, k)')
+    a = a.astype(np.int64, copy=False)
+    k = _counting_range(int(a.min()), int(a.max()), k)
+    counts = np.bincount(a, minlength=k)
+    return np.repeat(np.arange(k, dtype=a.dtype), counts)
+
+
+def _counting_sort_small(arr, k):
+    try:
+        arr = [operator.index(x) for x in arr]  # ints only, as for NumPy
+    except TypeError:
+        raise ValueError('counting_sort() needs ints in [0, k)') from None
+    k = _counting_range(min(arr, default=0), max(arr, default=-1), k)
+    counts = [0] * k
+    for x in arr:
+        counts[x] += 1
+    out = []
+    for x, c in enumerate(counts):
+        out += [x] * c
+    return np.array(out, dtype=np.int64)
+
+
+def _counting_range(lo, hi, k):
+    # k, defaulting to one past the largest value, after checking that
+    # every value from lo to hi is a valid index into the counts
+    if k is None:
+        k = hi + 1
+    if lo < 0 or hi >= k:
+        raise ValueError('counting_sort() needs ints in [0, k)')
+    return k
+
+
+def sort_by_key(keys, values):
+    # Stable sort of values by their integer keys, the key-value form of
+    # counting sort. NumPy's stable argsort already uses radix sort for
+    # small integer types, so it is not reimplemented here.
+    order = np.argsort(np.asarray(keys), kind='stable')
+    return np.asarray(values)[order]
+
+
+def batch_heapify(heaps):
+    # Turns every row of a 2d array of shape (k, n) into a max-heap, in place.
+    # For many small heaps (k-way merges, bucket PQs, batched top-k ...) a
+    # python call per heap would cost far more than the heapify itself, so
+    # instead each step of build_maxheap is done for all k rows at once.
+    n = heaps.shape[1]
+    for i in range(n // 2 - 1, -1, -1):
+        _batch_sift(heaps, i, n)
+
+
+def _batch_sift(H, i, n):
+    # max_heapify(H[row], i, n) for every row, vectorised across the rows.
+    # Rows drop out as soon as their key has settled.
+    rows = np.arange(H.shape[0])
+    cur = np.full(H.shape[0], i)
+    while rows.size:
+        l = 2 * cur + 1
+        r = l + 1
+        vc = H[rows, cur]
+        vl = H[rows, np.minimum(l, n - 1)]
+        vr = H[rows, np.minimum(r, n - 1)]
+        go_l = (l < n) & (vl > vc)
+        largest = np.where(go_l, l, cur)
+        vlargest = np.where(go_l, vl, vc)
+        largest = np.where((r < n) & (vr > vlargest), r, largest)
+        moved = largest != cur
+        rows, cur, largest = rows[moved], cur[moved], largest[moved]
+        H[rows, cur], H[rows, largest] = H[rows, largest], H[rows, cur]
+        cur = largest
+
+
+def top_k(arr, k):
+    # The k largest elements of arr, in no particular order (np.sort the
+    # result if order matters). np.partition runs quickselect in C, O(n)
+    # against O(n + klog(n)) for a heap and O(nlog(n)) for a full heap sort.
+    # For a short list the call overhead of NumPy dominates, and heapq wins.
+    if not isinstance(arr, np.ndarray) and len(arr) < _TOP_K_SMALL:
+        # np.array of an empty list would be float64, so take the dtype
+        # NumPy would give arr itself
+        return np.array(heapq.nlargest(max(k, 0), arr),
+                        dtype=np.asarray(arr).dtype)
+    a = np.asarray(arr)
+    if k <= 0:
+        return a[:0].copy()
+    if k >= a.size:
+        return a.copy()
+    return np.partition(a, -k)[-k:]
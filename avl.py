@@ -0,0 +1,499 @@
+"""
+AVL tree stored as a struct of arrays (see 1.3.6 of On Data Structures.py)
+
+Instead of one python object per node (a dict plus references, ~250 bytes
+for ~20 bytes of payload), every field lives in its own NumPy array and a
+node is simply an index into them:
+
+    keys   int64   key of the node
+    left   int32   index of the left child
+    right  int32   index of the right child
+    parent int32   index of the parent
+    meta   uint8   height of the subtree (a leaf being 1) in the high 6
+                   bits, balance factor + 1 in the low 2 bits, where the
+                   balance factor is height(left) - height(right)
+
+A missing child/parent is NIL, which is slot 0 of the arrays: a sentinel
+node that is never handed out, whose links point back at itself and whose
+height and balance factor are 0. Reading through NIL is therefore always
+safe and gives the values of an empty subtree, which removes the NIL checks
+from most hot loops. Freed slots are chained through left[] from free_head
+so that they can be reused by later inserts.
+
+The tree walks themselves are numba compiled free functions that take the
+arrays explicitly (the _avl_* functions below); AVLArena only owns the
+arrays and hands out node slots. Without numba, the same functions are taken
+from avl_c (the Cython build in avl_c.pyx) if it has been built, and run as
+plain python otherwise.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+NIL = 0
+
+if njit is None:
+    def njit(*args, **kwargs):
+        return lambda f: f
+    _HAVE_NUMBA = False
+else:
+    _HAVE_NUMBA = True
+
+
+# -------------------------------------------------------------------- #
+# Compiled tree operations
+# -------------------------------------------------------------------- #
+
+# Packing height and bf into one byte halves the per-node metadata, so twice
+# as many nodes share each cache line on the walk back up. AVL heights stay
+# far below 64 for any tree that int32 indices can address.
+
+@njit(cache=True)
+def _h(m):
+    return np.int64(m) >> 2
+
+
+@njit(cache=True)
+def _bf(m):
+    return (np.int64(m) & 3) - 1
+
+
+@njit(cache=True)
+def _pack(h, bf):
+    # A node that is out of balance (bf of +-2) is stored with bf bits 3;
+    # _rebalance works out which side is heavy from the children's heights.
+    return (h << 2) | ((bf + 1) & 3)
+
+
+_META_NIL = 1   # height 0, bf 0
+
+
+@njit(cache=True)
+def _update(left, right, meta, x):
+    hl = _h(meta[left[x]])
+    hr = _h(meta[right[x]])
+    meta[x] = _pack(1 + max(hl, hr), hl - hr)
+
+
+@njit(cache=True)
+def _replace_child(left, right, p, old, new):
+    # returns True if old was the root, i.e. new is now the root
+    if p == NIL:
+        return True
+    if left[p] == old:
+        left[p] = new
+    else:
+        right[p] = new
+    return False
+
+
+@njit(cache=True)
+def _rotate_left(left, right, parent, meta, x):
+    y = right[x]
+    right[x] = left[y]
+    if left[y] != NIL:
+        parent[left[y]] = x
+    p = parent[x]
+    parent[y] = p
+    _replace_child(left, right, p, x, y)
+    left[y] = x
+    parent[x] = y
+    _update(left, right, meta, x)
+    _update(left, right, meta, y)
+    return y
+
+
+@njit(cache=True)
+def _rotate_right(left, right, parent, meta, x):
+    y = left[x]
+    left[x] = right[y]
+    if right[y] != NIL:
+        parent[right[y]] = x
+    p = parent[x]
+    parent[y] = p
+    _replace_child(left, right, p, x, y)
+    right[y] = x
+    parent[x] = y
+    _update(left, right, meta, x)
+    _update(left, right, meta, y)
+    return y
+
+
+# Rotation needed at a node, indexed by its balance factor and that of its
+# heavier child (see _rebalance). This replaces the nested IFs of
+# Pseudocode 1 with a single table load.
+_ROT_NONE, _ROT_LL, _ROT_LR, _ROT_RR, _ROT_RL = 0, 1, 2, 3, 4
+_ROT_CASE = np.array([
+    # bf[child]:  -1        0         +1        (unused)
+    _ROT_RR,   _ROT_RR,   _ROT_RL,   _ROT_NONE,     # bf[x] = -2
+    _ROT_NONE, _ROT_NONE, _ROT_NONE, _ROT_NONE,     # bf[x] = -1
+    _ROT_NONE, _ROT_NONE, _ROT_NONE, _ROT_NONE,     # bf[x] =  0
+    _ROT_NONE, _ROT_NONE, _ROT_NONE, _ROT_NONE,     # bf[x] = +1
+    _ROT_LR,   _ROT_LL,   _ROT_LL,   _ROT_NONE,     # bf[x] = +2
+], dtype=np.int8)
+
+
+@njit(cache=True)
+def _rebalance(left, right, parent, meta, x):
+    # returns the index of the node now at x's position
+    #
+    # bf(x) is taken from the children's heights, as the packed one cannot
+    # tell +2 from -2. The child is only meaningful when |bf(x)| == 2;
+    # otherwise it may be NIL, and the row for bf(x) is all _ROT_NONE anyway.
+    xbf = _h(meta[left[x]]) - _h(meta[right[x]])
+    child = left[x] if xbf > 0 else right[x]
+    rot = _ROT_CASE[((xbf + 2) << 2) | (_bf(meta[child]) + 1)]
+    if rot == _ROT_NONE:
+        return x
+    if rot == _ROT_LR:
+        _rotate_left(left, right, parent, meta, child)
+    elif rot == _ROT_RL:
+        _rotate_right(left, right, parent, meta, child)
+    if rot <= _ROT_LR:
+        return _rotate_right(left, right, parent, meta, x)
+    return _rotate_left(left, right, parent, meta, x)
+
+
+@njit(cache=True)
+def _lookup(keys, left, right, root, key):
+    # The searched key is first stored in the sentinel, so the descent is
+    # bound to stop at it, either on the node holding key or on NIL. This
+    # leaves a single compare per level instead of a NIL check as well.
+    keys[NIL] = key
+    cur = root
+    while keys[cur] != key:
+        cur = left[cur] if key < keys[cur] else right[cur]
+    return cur
+
+
+@njit(cache=True)
+def _retrace(left, right, parent, meta, root, x):
+    # Walks from x towards the root after a delete below x, fixing heights
+    # and balance factors. As soon as a subtree comes out of this with the
+    # same height as before (rotated or not), nothing above it can have
+    # changed and the walk stops. This is the usual exit for AVL deletes; it
+    # saves the rest of the walk when it triggers, but a delete can still
+    # rotate at every level, so the worst case remains O(log(n)).
+    while x != NIL:
+        old = _h(meta[x])
+        _update(left, right, meta, x)
+        x = _rebalance(left, right, parent, meta, x)
+        if parent[x] == NIL:
+            root = x
+        if _h(meta[x]) == old:
+            break
+        x = parent[x]
+    return root
+
+
+@njit(cache=True)
+def _avl_insert(keys, left, right, parent, meta, root, x):
+    # Links the fresh node x (keys[x] already set) into the tree and returns
+    # (new_root, node). If the key was already present, node is the existing
+    # index and x is left unlinked.
+    #
+    # Top-down insert after Knuth: on the way down remember s, the last node
+    # whose bf is non-zero. Nodes below s have bf 0 and just grow by one,
+    # and s is the only node that can need a rotation. The walk back up from
+    # x to s uses parent[] rather than a stack.
+    key = keys[x]
+    if root == NIL:
+        parent[x] = NIL
+        return x, x
+    s = root
+    p = NIL
+    cur = root
+    while cur != NIL:
+        k = keys[cur]
+        if key == k:
+            return root, cur
+        if _bf(meta[cur]) != 0:
+            s = cur
+        p = cur
+        cur = left[cur] if key < k else right[cur]
+    parent[x] = p
+    if key < keys[p]:
+        left[p] = x
+    else:
+        right[p] = x
+
+    c = x
+    q = p
+    while q != s:
+        meta[q] = _pack(_h(meta[q]) + 1, 1 if left[q] == c else -1)
+        c = q
+        q = parent[q]
+
+    d = 1 if left[s] == c else -1
+    sbf = _bf(meta[s])
+    if sbf == 0:
+        # only possible when s is the root and the whole path was balanced
+        meta[s] = _pack(_h(meta[s]) + 1, d)
+    elif sbf == -d:
+        meta[s] = _pack(_h(meta[s]), 0)
+    else:
+        sub = _rebalance(left, right, parent, meta, s)
+        if parent[sub] == NIL:
+            root = sub
+    return root, x
+
+
+@njit(cache=True)
+def _avl_delete(keys, left, right, parent, meta, root, z):
+    # Unlinks node z and returns (new_root, freed), freed being the slot that
+    # is no longer in use (z's in-order successor if z had two children).
+    if left[z] != NIL and right[z] != NIL:
+        y = right[z]
+        while left[y] != NIL:
+            y = left[y]
+        keys[z] = keys[y]
+        z = y
+    child = left[z] if left[z] != NIL else right[z]
+    p = parent[z]
+    if child != NIL:
+        parent[child] = p
+    if _replace_child(left, right, p, z, child):
+        root = child
+    root = _retrace(left, right, parent, meta, root, p)
+    return root, z
+
+
+@njit(cache=True)
+def _build_sorted(left, right, parent, meta, lo, hi, p):
+    # Links slots [lo, hi), whose keys are sorted, into a balanced subtree
+    # under p and returns its root: the median slot, with each half built
+    # the same way. Both halves differ in size by at most one, so their
+    # heights differ by at most one too and no rebalancing is ever needed.
+    if lo >= hi:
+        return NIL
+    mid = (lo + hi) // 2
+    parent[mid] = p
+    left[mid] = _build_sorted(left, right, parent, meta, lo, mid, mid)
+    right[mid] = _build_sorted(left, right, parent, meta, mid + 1, hi,
+                               mid)
+    _update(left, right, meta, mid)
+    return mid
+
+
+# False when the functions above run as plain python, in which case
+# avl_pypy.AVLTree is the faster choice (see avl_tree.py)
+_COMPILED = _HAVE_NUMBA
+
+if not _HAVE_NUMBA:
+    try:
+        from avl_c import (_lookup, _avl_insert, _avl_delete, _rotate_left,
+                           _rotate_right, _rebalance, _build_sorted)
+        _COMPILED = True
+    except ImportError:
+        pass
+
+
+# -------------------------------------------------------------------- #
+# Traversals (see 1.3.3)
+# -------------------------------------------------------------------- #
+
+def inorder_morris(arena, root, visit):
+    # Morris traversal: calls visit(key) in sorted order using O(1) extra
+    # space. The in-order predecessor's empty right link is temporarily
+    # pointed back at cur so that the walk can climb back up without a
+    # stack, and is restored on the second visit.
+    left, right, keys = arena.left, arena.right, arena.keys
+    cur = root
+    while cur != NIL:
+        if left[cur] == NIL:
+            visit(keys[cur])
+            cur = right[cur]
+            continue
+        pred = left[cur]
+        while right[pred] != NIL and right[pred] != cur:
+            pred = right[pred]
+        if right[pred] == NIL:
+            right[pred] = cur
+            cur = left[cur]
+        else:
+            right[pred] = NIL
+            visit(keys[cur])
+            cur = right[cur]
+
+
+def preorder_morris(arena, root, visit):
+    # Same threading as inorder_morris, but a node is visited on the way
+    # down (when its thread is created) instead of on the way back up.
+    left, right, keys = arena.left, arena.right, arena.keys
+    cur = root
+    while cur != NIL:
+        if left[cur] == NIL:
+            visit(keys[cur])
+            cur = right[cur]
+            continue
+        pred = left[cur]
+        while right[pred] != NIL and right[pred] != cur:
+            pred = right[pred]
+        if right[pred] == NIL:
+            visit(keys[cur])
+            right[pred] = cur
+            cur = left[cur]
+        else:
+            right[pred] = NIL
+            cur = right[cur]
+
+
+def _as_key(key):
+    # key as an int, or None if no int64 key can be equal to it. The lookups
+    # store the key in keys[NIL] as their sentinel, so e.g. 2.5 would be
+    # truncated to 2 (avl_c) or never match it at all and loop forever.
+    try:
+        k = int(key)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if k != key or not -2**63 <= k < 2**63:
+        return None
+    return k
+
+
+class AVLArena:
+
+    def __init__(self, capacity=16):
+        capacity += 1   # for the NIL sentinel
+        self.keys = np.zeros(capacity, dtype=np.int64)
+        self.left = np.full(capacity, NIL, dtype=np.int32)
+        self.right = np.full(capacity, NIL, dtype=np.int32)
+        self.parent = np.full(capacity, NIL, dtype=np.int32)
+        self.meta = np.zeros(capacity, dtype=np.uint8)
+        self.meta[NIL] = _META_NIL
+        self.free_head = NIL
+        self.root = NIL
+        self.top = 1    # slots [1, top) have been handed out at least once
+        self.size = 0
+
+    @classmethod
+    def from_sorted(cls, arr):
+        # Builds the tree of a sorted array in O(n), rather than O(nlog(n))
+        # for n inserts. Node i simply takes slot i+1. Repeated keys are
+        # dropped, as insert() would do.
+        a = np.asarray(arr)
+        with np.errstate(invalid='ignore'):     # NaN/inf, caught just below
+            keys = np.ascontiguousarray(a, dtype=np.int64)
+        if not np.array_equal(keys, a):
+            raise ValueError('from_sorted() needs int64 keys')
+        a = keys
+        if not np.all(a[1:] >= a[:-1]):
+            raise ValueError('from_sorted() needs keys in ascending order')
+        if a.size > 1:
+            a = a[np.concatenate(([True], a[1:] != a[:-1]))]
+        n = len(a)
+        arena = cls(n)
+        arena.keys[1:n + 1] = a
+        arena.root = int(_build_sorted(arena.left, arena.right, arena.parent,
+                                       arena.meta, 1, n + 1, NIL))
+        arena.top = n + 1
+        arena.size = n
+        return arena
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        return self.lookup(key) != NIL
+
+    def __iter__(self):
+        # keys in sorted order
+        out = []
+        inorder_morris(self, self.root, out.append)
+        return iter(out)
+
+    # ---------------------------------------------------------------- #
+    # Node allocation
+    # ---------------------------------------------------------------- #
+
+    def _grow(self):
+        capacity = 2 * len(self.keys)
+        for name, fill in (('keys', 0), ('left', NIL), ('right', NIL),
+                           ('parent', NIL), ('meta', 0)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def alloc(self, key):
+        if self.free_head != NIL:
+            x = self.free_head
+        else:
+            if self.top == len(self.keys):
+                self._grow()
+            x = self.top
+        self.keys[x] = key  # may raise, so x is only claimed after this
+        if x == self.free_head:
+            self.free_head = int(self.left[x])
+        else:
+            self.top += 1
+        self.left[x] = self.right[x] = self.parent[x] = NIL
+        self.meta[x] = _pack(1, 0)
+        self.size += 1
+        return x
+
+    def free(self, x):
+        self.left[x] = self.free_head
+        self.free_head = x
+        self.size -= 1
+
+    # ---------------------------------------------------------------- #
+    # Basic operations
+    # ---------------------------------------------------------------- #
+
+    def lookup(self, key):
+        # index of the node holding key, or NIL
+        key = _as_key(key)
+        if key is None:
+            return NIL
+        return _lookup(self.keys, self.left, self.right, self.root, key)
+
+    def insert(self, key):
+        # duplicate keys are ignored; returns the index of the key's node
+        k = _as_key(key)
+        if k is None:
+            raise ValueError('AVLArena keys must be int64 values')
+        x = self.alloc(k)
+        self.root, node = _avl_insert(self.keys, self.left, self.right,
+                                      self.parent, self.meta,
+                                      self.root, x)
+        if node != x:
+            self.free(x)
+        return node
+
+    def delete(self, key):
+        # returns False if key is not in the tree
+        z = self.lookup(key)
+        if z == NIL:
+            return False
+        self.root, freed = _avl_delete(self.keys, self.left, self.right,
+                                       self.parent, self.meta,
+                                       self.root, z)
+        self.free(freed)
+        return True
+
+    # ---------------------------------------------------------------- #
+    # Rotations and rebalancing (see 1.3.5 and 1.3.6.4)
+    # ---------------------------------------------------------------- #
+
+    def _fix_root(self, y):
+        if self.parent[y] == NIL:
+            self.root = y
+        return y
+
+    def rotate_left(self, x):
+        return self._fix_root(_rotate_left(self.left, self.right, self.parent,
+                                           self.meta, x))
+
+    def rotate_right(self, x):
+        return self._fix_root(_rotate_right(self.left, self.right,
+                                            self.parent, self.meta, x))
+
+    def rebalance(self, x):
+        # returns the index of the node now at x's position
+        return self._fix_root(_rebalance(self.left, self.right, self.parent,
+                                         self.meta, x))
@@ -0,0 +1,292 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Cython build of the AVL tree operations in avl.py
+
+Same algorithms and same struct-of-arrays layout as the numba functions in
+avl.py, for when numba is not installed or its compile time on first use
+is too costly (e.g. short scripts). The cpdef wrappers have the signatures
+of their avl.py counterparts, so avl.py can use them as drop-in
+replacements. Build with:
+
+    python setup.py build_ext --inplace
+"""
+
+from libc.stdint cimport int8_t, int32_t, int64_t, uint8_t
+
+# slot 0 is the sentinel node, see the avl.py docstring
+cdef enum:
+    NIL = 0
+
+cdef enum:
+    ROT_NONE, ROT_LL, ROT_LR, ROT_RR, ROT_RL
+
+# see _ROT_CASE in avl.py
+cdef int8_t ROT_CASE[20]
+ROT_CASE[:] = [
+    ROT_RR,   ROT_RR,   ROT_RL,   ROT_NONE,
+    ROT_NONE, ROT_NONE, ROT_NONE, ROT_NONE,
+    ROT_NONE, ROT_NONE, ROT_NONE, ROT_NONE,
+    ROT_NONE, ROT_NONE, ROT_NONE, ROT_NONE,
+    ROT_LR,   ROT_LL,   ROT_LL,   ROT_NONE,
+]
+
+
+cdef struct Arena:
+    int64_t *keys
+    int32_t *left
+    int32_t *right
+    int32_t *parent
+    uint8_t *meta
+    int32_t root
+
+
+# -------------------------------------------------------------------- #
+# C level tree operations
+# -------------------------------------------------------------------- #
+
+# meta packing, see _h, _bf and _pack in avl.py
+cdef inline int h(uint8_t m) noexcept nogil:
+    return m >> 2
+
+
+cdef inline int bf(uint8_t m) noexcept nogil:
+    return (m & 3) - 1
+
+
+cdef inline uint8_t pack(int height, int balance) noexcept nogil:
+    return <uint8_t>((height << 2) | ((balance + 1) & 3))
+
+
+cdef inline void update(Arena *a, int32_t x) noexcept nogil:
+    cdef int hl = h(a.meta[a.left[x]])
+    cdef int hr = h(a.meta[a.right[x]])
+    a.meta[x] = pack(1 + (hl if hl > hr else hr), hl - hr)
+
+
+cdef inline void replace_child(Arena *a, int32_t p, int32_t old,
+                               int32_t new) noexcept nogil:
+    if p == NIL:
+        a.root = new
+    elif a.left[p] == old:
+        a.left[p] = new
+    else:
+        a.right[p] = new
+
+
+cdef int32_t rotate_left(Arena *a, int32_t x) noexcept nogil:
+    cdef int32_t y = a.right[x]
+    a.right[x] = a.left[y]
+    if a.left[y] != NIL:
+        a.parent[a.left[y]] = x
+    a.parent[y] = a.parent[x]
+    replace_child(a, a.parent[x], x, y)
+    a.left[y] = x
+    a.parent[x] = y
+    update(a, x)
+    update(a, y)
+    return y
+
+
+cdef int32_t rotate_right(Arena *a, int32_t x) noexcept nogil:
+    cdef int32_t y = a.left[x]
+    a.left[x] = a.right[y]
+    if a.right[y] != NIL:
+        a.parent[a.right[y]] = x
+    a.parent[y] = a.parent[x]
+    replace_child(a, a.parent[x], x, y)
+    a.right[y] = x
+    a.parent[x] = y
+    update(a, x)
+    update(a, y)
+    return y
+
+
+cdef int32_t rebalance(Arena *a, int32_t x) noexcept nogil:
+    cdef int xbf = h(a.meta[a.left[x]]) - h(a.meta[a.right[x]])
+    cdef int32_t child = a.left[x] if xbf > 0 else a.right[x]
+    cdef int8_t rot = ROT_CASE[((xbf + 2) << 2) | (bf(a.meta[child]) + 1)]
+    if rot == ROT_NONE:
+        return x
+    if rot == ROT_LR:
+        rotate_left(a, child)
+    elif rot == ROT_RL:
+        rotate_right(a, child)
+    if rot <= ROT_LR:
+        return rotate_right(a, x)
+    return rotate_left(a, x)
+
+
+cdef int32_t lookup(Arena *a, int64_t key) noexcept nogil:
+    cdef int32_t cur = a.root
+    a.keys[NIL] = key
+    while a.keys[cur] != key:
+        cur = a.left[cur] if key < a.keys[cur] else a.right[cur]
+    return cur
+
+
+cdef void retrace(Arena *a, int32_t x) noexcept nogil:
+    # stops once a subtree height is unchanged, see _retrace in avl.py
+    cdef int old
+    while x != NIL:
+        old = h(a.meta[x])
+        update(a, x)
+        x = rebalance(a, x)
+        if h(a.meta[x]) == old:
+            break
+        x = a.parent[x]
+
+
+cdef int32_t avl_insert(Arena *a, int32_t x) noexcept nogil:
+    # Knuth's top-down insert, see _avl_insert in avl.py
+    cdef int64_t key = a.keys[x]
+    cdef int32_t s, p, c, q, cur
+    cdef int d, sbf
+    if a.root == NIL:
+        a.parent[x] = NIL
+        a.root = x
+        return x
+    s = cur = a.root
+    p = NIL
+    while cur != NIL:
+        if key == a.keys[cur]:
+            return cur
+        if bf(a.meta[cur]) != 0:
+            s = cur
+        p = cur
+        cur = a.left[cur] if key < a.keys[cur] else a.right[cur]
+    a.parent[x] = p
+    if key < a.keys[p]:
+        a.left[p] = x
+    else:
+        a.right[p] = x
+
+    c = x
+    q = p
+    while q != s:
+        a.meta[q] = pack(h(a.meta[q]) + 1, 1 if a.left[q] == c else -1)
+        c = q
+        q = a.parent[q]
+
+    d = 1 if a.left[s] == c else -1
+    sbf = bf(a.meta[s])
+    if sbf == 0:
+        a.meta[s] = pack(h(a.meta[s]) + 1, d)
+    elif sbf == -d:
+        a.meta[s] = pack(h(a.meta[s]), 0)
+    else:
+        rebalance(a, s)
+    return x
+
+
+cdef int32_t avl_delete(Arena *a, int32_t z) noexcept nogil:
+    # unlinks z and returns the slot that is no longer in use
+    cdef int32_t y, child, p
+    if a.left[z] != NIL and a.right[z] != NIL:
+        y = a.right[z]
+        while a.left[y] != NIL:
+            y = a.left[y]
+        a.keys[z] = a.keys[y]
+        z = y
+    child = a.left[z] if a.left[z] != NIL else a.right[z]
+    p = a.parent[z]
+    if child != NIL:
+        a.parent[child] = p
+    replace_child(a, p, z, child)
+    retrace(a, p)
+    return z
+
+
+cdef int32_t build_sorted(Arena *a, int32_t lo, int32_t hi,
+                          int32_t p) noexcept nogil:
+    # median build of slots [lo, hi), see _build_sorted in avl.py
+    cdef int32_t mid
+    if lo >= hi:
+        return NIL
+    mid = (lo + hi) // 2
+    a.parent[mid] = p
+    a.left[mid] = build_sorted(a, lo, mid, mid)
+    a.right[mid] = build_sorted(a, mid + 1, hi, mid)
+    update(a, mid)
+    return mid
+
+
+# -------------------------------------------------------------------- #
+# Python wrappers, taking the AVLArena arrays
+# -------------------------------------------------------------------- #
+
+cdef inline Arena _arena(int32_t[::1] left, int32_t[::1] right,
+                         int32_t[::1] parent, uint8_t[::1] meta,
+                         int32_t root):
+    cdef Arena a
+    a.keys = NULL
+    a.left = &left[0]
+    a.right = &right[0]
+    a.parent = &parent[0]
+    a.meta = &meta[0]
+    a.root = root
+    return a
+
+
+cpdef int32_t _lookup(int64_t[::1] keys, int32_t[::1] left,
+                      int32_t[::1] right, int32_t root, int64_t key):
+    cdef Arena a
+    a.keys = &keys[0]
+    a.left = &left[0]
+    a.right = &right[0]
+    a.root = root
+    with nogil:
+        return lookup(&a, key)
+
+
+cpdef tuple _avl_insert(int64_t[::1] keys, int32_t[::1] left,
+                        int32_t[::1] right, int32_t[::1] parent,
+                        uint8_t[::1] meta, int32_t root, int32_t x):
+    cdef Arena a = _arena(left, right, parent, meta, root)
+    cdef int32_t node
+    a.keys = &keys[0]
+    with nogil:
+        node = avl_insert(&a, x)
+    return a.root, node
+
+
+cpdef tuple _avl_delete(int64_t[::1] keys, int32_t[::1] left,
+                        int32_t[::1] right, int32_t[::1] parent,
+                        uint8_t[::1] meta, int32_t root, int32_t z):
+    cdef Arena a = _arena(left, right, parent, meta, root)
+    cdef int32_t freed
+    a.keys = &keys[0]
+    with nogil:
+        freed = avl_delete(&a, z)
+    return a.root, freed
+
+
+cpdef int32_t _rotate_left(int32_t[::1] left, int32_t[::1] right,
+                           int32_t[::1] parent, uint8_t[::1] meta,
+                           int32_t x):
+    cdef Arena a = _arena(left, right, parent, meta, NIL)
+    with nogil:
+        return rotate_left(&a, x)
+
+
+cpdef int32_t _rotate_right(int32_t[::1] left, int32_t[::1] right,
+                            int32_t[::1] parent, uint8_t[::1] meta,
+                            int32_t x):
+    cdef Arena a = _arena(left, right, parent, meta, NIL)
+    with nogil:
+        return rotate_right(&a, x)
+
+
+cpdef int32_t _rebalance(int32_t[::1] left, int32_t[::1] right,
+                         int32_t[::1] parent, uint8_t[::1] meta,
+                         int32_t x):
+    cdef Arena a = _arena(left, right, parent, meta, NIL)
+    with nogil:
+        return rebalance(&a, x)
+
+
+cpdef int32_t _build_sorted(int32_t[::1] left, int32_t[::1] right,
+                            int32_t[::1] parent, uint8_t[::1] meta,
+                            int32_t lo, int32_t hi, int32_t p):
+    cdef Arena a = _arena(left, right, parent, meta, p)
+    with nogil:
+        return build_sorted(&a, lo, hi, p)
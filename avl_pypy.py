@@ -0,0 +1,210 @@
+"""
+AVL tree of plain python nodes (see 1.3.6 of On Data Structures.py)
+
+The same algorithms as avl.py, but with one object per node and no NumPy or
+numba. On CPython this is the slow option; on PyPy it is the fast one, as
+PyPy's tracing JIT handles attribute access on __slots__ classes very well
+and NumPy scalars in the hot loops would only get in its way. avl_tree.py
+picks between the two.
+"""
+
+
+class Node:
+    __slots__ = ('key', 'left', 'right', 'parent', 'bf', 'height')
+
+    def __init__(self, key, parent=None):
+        self.key = key
+        self.left = None
+        self.right = None
+        self.parent = parent
+        self.bf = 0         # height(left) - height(right)
+        self.height = 1
+
+
+def _h(x):
+    return 0 if x is None else x.height
+
+
+def _update(x):
+    hl, hr = _h(x.left), _h(x.right)
+    x.height = 1 + (hl if hl > hr else hr)
+    x.bf = hl - hr
+
+
+class AVLTree:
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    @classmethod
+    def from_sorted(cls, arr):
+        # O(n) build from sorted keys, see AVLArena.from_sorted()
+        keys = []
+        for k in arr:
+            if keys and k < keys[-1]:
+                raise ValueError('from_sorted() needs keys in ascending order')
+            if not keys or k != keys[-1]:
+                keys.append(k)
+
+        def build(lo, hi, p):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            x = Node(keys[mid], p)
+            x.left = build(lo, mid, x)
+            x.right = build(mid + 1, hi, x)
+            _update(x)
+            return x
+
+        tree = cls()
+        tree.root = build(0, len(keys), None)
+        tree.size = len(keys)
+        return tree
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        return self.lookup(key) is not None
+
+    def __iter__(self):
+        # keys in sorted order
+        stack, cur = [], self.root
+        while stack or cur is not None:
+            while cur is not None:
+                stack.append(cur)
+                cur = cur.left
+            cur = stack.pop()
+            yield cur.key
+            cur = cur.right
+
+    # ---------------------------------------------------------------- #
+    # Basic operations
+    # ---------------------------------------------------------------- #
+
+    def lookup(self, key):
+        # node holding key, or None
+        cur = self.root
+        while cur is not None and cur.key != key:
+            cur = cur.left if key < cur.key else cur.right
+        return cur
+
+    def insert(self, key):
+        # Knuth's top-down insert, see _avl_insert in avl.py. Duplicate keys
+        # are ignored; returns the key's node.
+        if self.root is None:
+            self.root = Node(key)
+            self.size = 1
+            return self.root
+        s = p = cur = self.root
+        while cur is not None:
+            if key == cur.key:
+                return cur
+            if cur.bf != 0:
+                s = cur
+            p = cur
+            cur = cur.left if key < cur.key else cur.right
+        x = Node(key, p)
+        if key < p.key:
+            p.left = x
+        else:
+            p.right = x
+        self.size += 1
+
+        c, q = x, p
+        while q is not s:
+            q.bf = 1 if q.left is c else -1
+            q.height += 1
+            c, q = q, q.parent
+
+        d = 1 if s.left is c else -1
+        if s.bf == 0:
+            s.bf = d
+            s.height += 1
+        elif s.bf == -d:
+            s.bf = 0
+        else:
+            s.bf += d
+            self.rebalance(s)
+        return x
+
+    def delete(self, key):
+        # returns False if key is not in the tree
+        z = self.lookup(key)
+        if z is None:
+            return False
+        if z.left is not None and z.right is not None:
+            y = z.right
+            while y.left is not None:
+                y = y.left
+            z.key = y.key
+            z = y
+        child = z.left if z.left is not None else z.right
+        p = z.parent
+        if child is not None:
+            child.parent = p
+        self._replace_child(p, z, child)
+        self.size -= 1
+        self._retrace(p)
+        return True
+
+    # ---------------------------------------------------------------- #
+    # Rotations and rebalancing (see 1.3.5 and 1.3.6.4)
+    # ---------------------------------------------------------------- #
+
+    def _replace_child(self, p, old, new):
+        if p is None:
+            self.root = new
+        elif p.left is old:
+            p.left = new
+        else:
+            p.right = new
+
+    def rotate_left(self, x):
+        y = x.right
+        x.right = y.left
+        if y.left is not None:
+            y.left.parent = x
+        y.parent = x.parent
+        self._replace_child(x.parent, x, y)
+        y.left = x
+        x.parent = y
+        _update(x)
+        _update(y)
+        return y
+
+    def rotate_right(self, x):
+        y = x.left
+        x.left = y.right
+        if y.right is not None:
+            y.right.parent = x
+        y.parent = x.parent
+        self._replace_child(x.parent, x, y)
+        y.right = x
+        x.parent = y
+        _update(x)
+        _update(y)
+        return y
+
+    def rebalance(self, x):
+        # returns the node now at x's position
+        if x.bf > 1:
+            if x.left.bf < 0:
+                self.rotate_left(x.left)
+            return self.rotate_right(x)
+        if x.bf < -1:
+            if x.right.bf > 0:
+                self.rotate_right(x.right)
+            return self.rotate_left(x)
+        return x
+
+    def _retrace(self, x):
+        # stops once a subtree height is unchanged, see _retrace in avl.py
+        while x is not None:
+            old = x.height
+            _update(x)
+            x = self.rebalance(x)
+            if x.height == old:
+                break
+            x = x.parent
@@ -0,0 +1,28 @@
+"""
+Picks the AVL tree implementation suited to the running interpreter
+
+    avl.AVLArena      NumPy struct of arrays + numba (or avl_c), for CPython
+    avl_pypy.AVLTree  plain __slots__ objects, for PyPy, or on CPython when
+                      neither numba nor a built avl_c is available
+
+Which one is faster depends on the interpreter rather than the algorithm:
+PyPy's JIT does well on pointer-heavy object code, while on CPython the
+interpreter overhead has to be compiled away. Both share the same interface
+(insert, delete, from_sorted, len, in, iteration in sorted order); only
+lookup/insert return a node index for AVLArena and a Node for AVLTree.
+"""
+
+import platform
+
+try:
+    import avl
+except ImportError:     # NumPy is not installed
+    avl = None
+
+# AVLArena running as plain python on NumPy scalars is an order of magnitude
+# slower than the object version, so it is only picked when compiled.
+if (platform.python_implementation() != 'PyPy' and avl is not None
+        and avl._COMPILED):
+    from avl import AVLArena as AVLTree
+else:
+    from avl_pypy import AVLTree
@@ -0,0 +1,105 @@
+"""
+Compiled max-heap operations (see 1.2.2 of On Data Structures.py)
+
+The heap is held in a contiguous np.ndarray of int64 and indexed from 0, so
+the children of node i are 2*i+1 and 2*i+2 (see 1.2.1 B.4). Both functions
+are compiled with numba, which replaces the per compare/swap bytecode
+dispatch of CPython with native code.
+
+max_heapify() is written as a while loop rather than recursively, as numba
+cannot cache recursive functions cheaply and the loop needs no stack frames.
+"""
+
+import numpy as np
+from numba import from_dtype, intp, njit, void
+
+
+@njit(cache=True)
+def _max_heapify(a, i, n):
+    # trickle a[i] down until both children are smaller, considering a[:n]
+    while True:
+        l = 2 * i + 1
+        r = 2 * i + 2
+        largest = i
+        if l < n and a[l] > a[largest]:
+            largest = l
+        if r < n and a[r] > a[largest]:
+            largest = r
+        if largest == i:
+            return
+        a[i], a[largest] = a[largest], a[i]
+        i = largest
+
+
+@njit(cache=True)
+def max_heapify(a, i):
+    _max_heapify(a, i, a.shape[0])
+
+
+# Subtrees of at most TILE nodes are heapified one at a time, see
+# build_maxheap(). 2048 int64s is half of a 32 KB L1 cache.
+TILE = 2048
+# levels of the largest full subtree with fewer than TILE nodes
+_TILE_LEVELS = TILE.bit_length() - 1
+
+
+@njit(cache=True)
+def _max_heapify_subtree(a, v, n, levels):
+    # heapify the subtree rooted at v, which spans at most `levels` levels,
+    # going bottom-up level by level (its leaves need no work)
+    last = n // 2 - 1   # last node with a child
+    for j in range(levels - 2, -1, -1):
+        first = (v + 1) * (1 << j) - 1
+        stop = min(first + (1 << j), last + 1)
+        for i in range(stop - 1, first - 1, -1):
+            _max_heapify(a, i, n)
+
+
+@njit(cache=True)
+def build_maxheap(a):
+    # In a plain bottom-up build, the nodes i, 2i+1, 2i+2 touched by the lower
+    # levels sit further and further apart, so for a large heap each level
+    # streams the whole bottom of the array through the cache again. Instead,
+    # the bottom _TILE_LEVELS levels are split into independent subtrees of
+    # < TILE nodes, and each is heapified completely while it fits in L1.
+    # Only the few levels above them are then done across the whole array.
+    n = a.shape[0]
+    depth = 0   # depth of the last node, the root being at depth 0
+    while (1 << (depth + 1)) - 1 < n:
+        depth += 1
+    top = depth - _TILE_LEVELS + 1   # depth of the subtree roots
+    if top <= 0:
+        for i in range(n // 2 - 1, -1, -1):
+            _max_heapify(a, i, n)
+        return
+    first = (1 << top) - 1
+    for v in range(min(2 * first, n - 1), first - 1, -1):
+        _max_heapify_subtree(a, v, n, _TILE_LEVELS)
+    for i in range(first - 1, -1, -1):
+        _max_heapify(a, i, n)
+
+
+_specialised = {}
+
+
+def make_heap(dtype):
+    # Returns (max_heapify, build_maxheap) compiled up front for contiguous
+    # 1-d arrays of the given dtype, with the same signatures as the module
+    # level functions. numba already specialises a function per argument
+    # type on its first call, but the dispatchers above still type check
+    # every call and compile lazily. The versions returned here have a
+    # single fixed signature, so they are compiled once, right now (or
+    # loaded from the on-disk cache), and a wrongly typed array is rejected
+    # instead of triggering a new compile.
+    dtype = np.dtype(dtype)
+    if dtype not in _specialised:
+        arr = from_dtype(dtype)[::1]
+        heapify = njit(void(arr, intp), cache=True)(max_heapify.py_func)
+        build = njit(void(arr), cache=True)(build_maxheap.py_func)
+        _specialised[dtype] = (heapify, build)
+    return _specialised[dtype]
+
+
+# Pay the compile cost once at import (and once per on-disk cache) rather
+# than on the first real call.
+build_maxheap(np.empty(0, dtype=np.int64))
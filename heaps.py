@@ -0,0 +1,39 @@
+"""
+Max-heap operations and heap sort on a plain python list
+(see 1.2.2 and 1.2.3 of On Data Structures.py)
+
+Indexes start from 0, so the children of node i are 2*i+1 and 2*i+2.
+heap_numba.py has compiled versions of the same functions for int64 arrays,
+and top_k() and batch_heapify() for NumPy arrays are in arrays.py, so that
+this module does not need NumPy.
+"""
+
+
+def max_heapify(A, i, n):
+    # Iterative rather than recursive - no stack frame per level, so heap
+    # sort runs in O(1) extra space instead of O(log(n)).
+    while True:
+        l, r = 2 * i + 1, 2 * i + 2
+        largest = i
+        if l < n and A[l] > A[largest]:
+            largest = l
+        if r < n and A[r] > A[largest]:
+            largest = r
+        if largest == i:
+            return
+        A[i], A[largest] = A[largest], A[i]
+        i = largest
+
+
+def build_maxheap(A):
+    n = len(A)
+    for i in range(n // 2 - 1, -1, -1):
+        max_heapify(A, i, n)
+
+
+def heapsort(A):
+    # sorts A in place, ascending
+    build_maxheap(A)
+    for end in range(len(A) - 1, 0, -1):
+        A[0], A[end] = A[end], A[0]
+        max_heapify(A, 0, end)
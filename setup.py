@@ -0,0 +1,15 @@
+# Builds avl_c.pyx, the Cython fallback for the numba code in avl.py:
+#
+#     python setup.py build_ext --inplace
+
+from setuptools import Extension, setup
+from Cython.Build import cythonize
+
+setup(
+    name='data-struct-notes',
+    ext_modules=cythonize(
+        [Extension('avl_c', ['avl_c.pyx'],
+                   extra_compile_args=['-O3', '-march=native'])],
+        language_level=3,
+    ),
+)